@@ -25,13 +25,26 @@ Defines an API endpoints for fetching market orders and static data from ESI.
 """
 
 import base64
-import threading
-import time
+import hashlib
+import importlib.util
+import operator
 
-import requests
+from array import array
 
+try:
+    import orjson as json
+except ImportError:
+    import json
+
+from . import cache
 from . import stats
 
+# Brotli is only advertised to ESI when a decoder for it is installed
+if importlib.util.find_spec('brotli'):
+    ACCEPT_ENCODING = 'gzip, br'
+else:
+    ACCEPT_ENCODING = 'gzip'
+
 class GlobalAPI():
     """
     Base class for ESI API end points, and for fetching static data.
@@ -56,8 +69,11 @@ class GlobalAPI():
     # info
     __MARKET_GROUPS = 'https://esi.evetech.net/latest/markets/groups/{}'
 
-    # The number of 500 series error retries
-    _ERROR_RETRIES = 3
+    # The API endpoint for resolving a batch of IDs to names
+    __NAMES         = 'https://esi.evetech.net/latest/universe/names/'
+
+    # The maximum number of IDs the names endpoint accepts per request
+    __NAMES_MAX     = 1000
 
     def __init__(self, config):
         """
@@ -72,8 +88,14 @@ class GlobalAPI():
         self.__app_secret = config.get('request', 'appsecret')
         self.__config = config
         self.__refresh_token = config.get('request', 'refresh_token')
+        self.__static_cache = cache.StaticCache.instance(config)
         self.__user_agent = config.get('request', 'agent')
 
+        self.__headers = {
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'User-Agent': self.__user_agent
+        }
+
     def set_access(self, access_token='', refresh_token=''):
         """
         Updates the access and refresh token for the API instance. IF tokens
@@ -95,10 +117,13 @@ class GlobalAPI():
         else:
             self.__refresh_token = self.__config.get('request', 'refresh_token')
 
-    def fetch_access(self):
+    def fetch_access(self, session):
         """
         Requests a new access token using the current refresh token
 
+        Args:
+            session: The shared HTTPS session used to send the request.
+
         Returns:
             The new access token.
         """
@@ -114,10 +139,10 @@ class GlobalAPI():
             'refresh_token': self.__refresh_token
         }
 
-        request = requests.post(self.__AUTH, data=body, headers=headers)
+        request = session.post(self.__AUTH, data=body, headers=headers)
         request.raise_for_status()
 
-        return request.json()
+        return json.loads(request.content)
 
     def fetch_regions(self, worker):
         """
@@ -222,51 +247,85 @@ class GlobalAPI():
         return self._fetch_unpaged(
             worker, '', self.__MARKET_GROUPS.format(group_id), False)
 
-    def _fetch_unpaged(self, worker, etag, req_url, needs_auth, **kwargs):
-        num_errors = 0
-        data = None
-        with stats.Stats.Timer() as timer:
-            while True:
-                success, data, status = self._fetch_api_unpaged(
-                    worker, etag, req_url, needs_auth, **kwargs)
+    def fetch_names(self, worker, ids):
+        """
+        Resolves a list of IDs to names, using one request per 1000 IDs
+        rather than one request per ID.
+
+        Args:
+            worker: The marketwatch.worker.Worker containing local state.
+            ids: The list of IDs to resolve.
+
+        Returns:
+            A dict of ID -> name info fields for each resolved ID. IDs from a
+            chunk whose request failed are missing from the dict.
+        """
+
+        names = {}
+        for start in range(0, len(ids), self.__NAMES_MAX):
+            chunk = ids[start:start + self.__NAMES_MAX]
+
+            with stats.Stats.Timer() as timer:
+                request = worker.session().post(
+                    self.__NAMES, json=chunk, headers=self.__headers)
+
+            worker.stats().update(stats.Stats.REQUEST, runtime=timer.elapsed())
+            if request.status_code >= 400:
+                worker.log().error(
+                    "API request error %d for %s",
+                    request.status_code, self.__NAMES)
+                worker.stats().update(stats.Stats.REQUEST, total=1, failure=1)
+                continue
 
-                if success or num_errors >= self._ERROR_RETRIES:
-                    break
+            worker.stats().update(stats.Stats.REQUEST, total=1, changed=1)
+            for info in json.loads(request.content):
+                names[info['id']] = info
 
-                if status < 500:
-                    break
+        return names
 
-                num_errors += 1
-                worker.log().info("\tRetrying after %i attempts", num_errors)
-                time.sleep(0.5*num_errors)
+    def _fetch_unpaged(self, worker, etag, req_url, needs_auth, **kwargs):
+        cached = None
+        use_cache = self.__static_cache and not needs_auth and not kwargs
+        if use_cache and not etag:
+            cached = self.__static_cache.get(req_url)
+            if cached:
+                etag = cached[0]
+
+        with stats.Stats.Timer() as timer:
+            success, data, status, etag = self._fetch_api_unpaged(
+                worker, etag, req_url, needs_auth, **kwargs)
+
+        if status == 304 and cached:
+            data = cached[1]
+        elif use_cache and success and etag:
+            self.__static_cache.put(req_url, etag, data)
 
         worker.stats().update(stats.Stats.REQUEST, runtime=timer.elapsed())
         return data
 
     def _fetch_api_unpaged(self, worker, etag, req_url, needs_auth, **kwargs):
+        prev_etag = etag
         request, etag = self._fetch_api(
             worker, req_url, kwargs, etag, needs_auth)
 
         if request is None:
             worker.stats().update(stats.Stats.REQUEST, total=1, failure=1)
-            return (False, None, 403)
+            return (False, None, 403, etag)
 
         if request.status_code >= 400:
             worker.stats().update(stats.Stats.REQUEST, total=1, failure=1)
-            return (False, None, request.status_code)
+            return (False, None, request.status_code, etag)
 
-        if request.status_code == 304:
+        if request.status_code == 304 or (prev_etag and etag == prev_etag):
             worker.stats().update(stats.Stats.REQUEST, total=1)
-            return (True, None, 304)
+            return (True, None, 304, etag)
 
         worker.stats().update(stats.Stats.REQUEST, total=1, changed=1)
-        return (True, request.json(), 200)
+        return (True, json.loads(request.content), 200, etag)
 
     def _fetch_api(self, worker, url, params, etag, needs_auth):
-        headers = {
-            'If-None-Match': etag,
-            'User-Agent': self.__user_agent
-        }
+        headers = self.__headers.copy()
+        headers['If-None-Match'] = etag
 
         if needs_auth:
             if not self.__access_token:
@@ -274,20 +333,28 @@ class GlobalAPI():
                 return (None, "")
             headers['Authorization'] = 'Bearer ' + self.__access_token
 
+        # httpx sends None params as empty values where requests omits them,
+        # so they are dropped to keep both sessions sending the same query
+        params = {key: value for key, value in params.items()
+                  if value is not None}
         request = worker.session().get(url, params=params, headers=headers)
 
-        try:
-            request.raise_for_status()
-        except Exception:
-            worker.log().exception("API request error")
+        if request.status_code >= 400:
+            worker.log().error(
+                "API request error %d for %s", request.status_code, url)
             return (request, "")
 
-        if 'etag' in request.headers:
-            etag = request.headers['etag']
-        else:
-            etag = ""
+        response_etag = request.headers.get('etag')
+        if response_etag:
+            return (request, response_etag)
 
-        return (request, etag)
+        if request.status_code == 304:
+            return (request, etag)
+
+        # ESI omitted the etag, so tag the body with a weak etag derived from
+        # its content, which lets an identical body be treated as unmodified
+        digest = hashlib.blake2b(request.content, digest_size=16).hexdigest()
+        return (request, 'W/"{}"'.format(digest))
 
 class RegionalAPI(GlobalAPI):
     """
@@ -312,9 +379,22 @@ class RegionalAPI(GlobalAPI):
     __REGION_TYPES  = 'https://esi.evetech.net/latest/markets/{}/types/'
 
 
+    # The key format for a persisted type order page, by type ID and number
+    __ORDER_PAGE_KEY  = 'o:{}:{}'
+
+    # The key prefix for a persisted structure order page
+    __STRUCT_PAGE_PREFIX = 's:'
+
+    # The key format for a persisted structure order page, by structure ID
+    # and page number
+    __STRUCT_PAGE_KEY = __STRUCT_PAGE_PREFIX + '{}:{}'
+
     # The maxmimum valid station ID
     __STATION_MAX   = 69999999
 
+    # Extracts the order ID from a decoded market order
+    __ORDER_ID      = operator.itemgetter('order_id')
+
     class Page():
         """
         Utility for tracking a paged resource from ESI. Tracks a page number
@@ -337,18 +417,20 @@ class RegionalAPI(GlobalAPI):
 
         GlobalAPI.__init__(self, config)
 
-        self.__location_cache = {}
+        self.__known_locations = set()
+        self.__valid_locations = set()
 
-        self.__order_page_lock = threading.Lock()
+        # Page caches are only ever populated with dict.setdefault, which is
+        # atomic under the GIL, so concurrent page fetches need no lock
         self.__order_pages = {}
-
-        self.__struct_page_lock = threading.Lock()
         self.__struct_pages = {}
-
-        self.__type_page_lock = threading.Lock()
         self.__type_pages = {}
 
+        self.__dirty_pages = {}
+
         self.__region_id = region_id
+        self.__orders_url = self.__REGION_ORDERS.format(region_id)
+        self.__types_url = self.__REGION_TYPES.format(region_id)
 
     def region_id(self):
         """
@@ -357,12 +439,49 @@ class RegionalAPI(GlobalAPI):
 
         return self.__region_id
 
+    def get_dirty_pages(self):
+        """
+        Returns the order pages that received new data since the last call,
+        and clears the dirty page list.
+
+        Returns:
+            A dict of page key -> (etag, order IDs) pairs.
+        """
+
+        dirty_pages, self.__dirty_pages = self.__dirty_pages, {}
+        return {
+            key: (page.etag, page.cache) for key, page in dirty_pages.items()}
+
+    def set_pages(self, pages):
+        """
+        Seeds the order page caches, e.g. from pages persisted by a previous
+        process, so that the first fetch can be answered with a 304.
+
+        Args:
+            pages: A dict of page key -> (etag, order IDs) pairs, in the form
+                returned by get_dirty_pages.
+        """
+
+        for key, (etag, page_cache) in pages.items():
+            _, owner_id, number = key.split(':')
+            owner_id = None if owner_id == 'None' else int(owner_id)
+
+            if key.startswith(self.__STRUCT_PAGE_PREFIX):
+                page = self.__get_page(
+                    self.__struct_pages, owner_id, int(number))
+            else:
+                page = self.__get_page(
+                    self.__order_pages, owner_id, int(number))
+
+            page.etag = etag
+            page.cache = page_cache
+
     def location_ids(self):
         """
         Returns the cached location ID list for this API instance.
         """
 
-        return [loc for loc, valid in self.__location_cache if valid]
+        return list(self.__valid_locations)
 
     def fetch_location_info(self, worker, location_id):
         """
@@ -376,22 +495,23 @@ class RegionalAPI(GlobalAPI):
             The info fields for the specified ID.
         """
 
-        if location_id in self.__location_cache:
+        if location_id in self.__known_locations:
             return (None, True)
 
         if location_id <= self.__STATION_MAX:
             info = self.fetch_station_info(worker, location_id)
             if info:
-                self.__location_cache[location_id] = False
+                self.__known_locations.add(location_id)
                 info['is_struct'] = False
             return (info, False)
 
         info = self.fetch_structure_info(worker, location_id)
         if not info:
-            self.__location_cache[location_id] = False
+            self.__known_locations.add(location_id)
             return (None, False)
 
-        self.__location_cache[location_id] = True
+        self.__known_locations.add(location_id)
+        self.__valid_locations.add(location_id)
         info['station_id'] = location_id
         info['system_id'] = info['solar_system_id']
         info['is_struct'] = True
@@ -479,125 +599,140 @@ class RegionalAPI(GlobalAPI):
             worker, None, False, RegionalAPI.__fetch_type_page)
 
     def __fetch_struct_order_page(self, worker, number, needs_auth, struct_id):
-        with self.__struct_page_lock:
-            if not struct_id in self.__struct_pages:
-                struct_pages = self.__struct_pages[struct_id] = []
-            else:
-                struct_pages = self.__struct_pages[struct_id]
-
-            if number > len(struct_pages):
-                struct_page = self.Page(number)
-                struct_pages.insert(number-1, struct_page)
-            else:
-                struct_page = struct_pages[number-1]
+        struct_page = self.__get_page(self.__struct_pages, struct_id, number)
 
         req_url = self.__STRUCT_ORDERS.format(struct_id)
         max_pages, orders, status = self.__fetch_api_page(
             worker, struct_page, req_url, needs_auth)
 
         if orders:
-            struct_page.cache = []
-            for order in orders:
-                struct_page.cache.append(int(order['order_id']))
+            struct_page.cache = array('Q', map(self.__ORDER_ID, orders))
+            page_key = self.__STRUCT_PAGE_KEY.format(struct_id, number)
+            self.__dirty_pages[page_key] = struct_page
             return (max_pages, orders, None, status)
 
         return (max_pages, orders, struct_page.cache, status)
 
     def __fetch_type_order_page(self, worker, number, needs_auth, type_id):
-        with self.__order_page_lock:
-            if not type_id in self.__order_pages:
-                order_pages = self.__order_pages[type_id] = []
-            else:
-                order_pages = self.__order_pages[type_id]
-
-            if number > len(order_pages):
-                order_page = self.Page(number)
-                order_pages.insert(number-1, order_page)
-            else:
-                order_page = order_pages[number-1]
+        order_page = self.__get_page(self.__order_pages, type_id, number)
 
-        req_url = self.__REGION_ORDERS.format(self.__region_id)
+        req_url = self.__orders_url
         max_pages, orders, status = self.__fetch_api_page(
             worker, order_page, req_url, needs_auth, type_id=type_id)
 
         if orders:
-            order_page.cache = []
-            for order in orders:
-                order_page.cache.append(int(order['order_id']))
+            order_page.cache = array('Q', map(self.__ORDER_ID, orders))
+            page_key = self.__ORDER_PAGE_KEY.format(type_id, number)
+            self.__dirty_pages[page_key] = order_page
             return (max_pages, orders, None, status)
 
         return (max_pages, orders, order_page.cache, status)
 
     def __fetch_type_page(self, worker, number, needs_auth):
-        with self.__type_page_lock:
-            if number in self.__type_pages:
-                type_page = self.__type_pages[number]
-            else:
-                type_page = self.Page(number)
-                self.__type_pages[number] = type_page
+        type_page = self.__type_pages.get(number)
+        if type_page is None:
+            type_page = self.__type_pages.setdefault(number, self.Page(number))
 
-        req_url = self.__REGION_TYPES.format(self.__region_id)
+        req_url = self.__types_url
         max_pages, orders, status = self.__fetch_api_page(
             worker, type_page, req_url, needs_auth)
         return (max_pages, orders, None, status)
 
-    def __fetch_paged(self, worker, callback, needs_auth, func, *args, **kwargs):
-        current_page = 1
-        num_errors = 0
+    def __get_page(self, pages, owner_id, number):
+        owner_pages = pages.get(owner_id)
+        if owner_pages is None:
+            owner_pages = pages.setdefault(owner_id, {})
+
+        page = owner_pages.get(number)
+        if page is None:
+            page = owner_pages.setdefault(number, self.Page(number))
 
+        return page
+
+    def __fetch_paged(self, worker, callback, needs_auth, func, *args, **kwargs):
+        request_stats = stats.Stats()
+        with stats.Stats.Timer() as timer:
+            first = self.__fetch_page(
+                worker, 1, needs_auth, func, *args, **kwargs)
+        runtime = timer.elapsed()
+
+        futures = []
+        max_pages, status = first[1], first[4]
+        if max_pages > 1 and not (status >= 400 and status < 500):
+            futures = [
+                worker.executor().submit(
+                    self.__fetch_page, worker, number, needs_auth,
+                    func, *args, **kwargs)
+                for number in range(2, max_pages + 1)]
+
+        # Pages are handed on in page order as soon as each one arrives, and
+        # pages that were fetched are always handed on even if another page
+        # failed, since their etags and cached IDs have already been updated
         data_pages = []
         cache_pages = []
-        with stats.Stats.Timer() as timer:
-            while True:
-                max_pages, data, cache, status = func(
-                    self, worker, current_page, needs_auth, *args, **kwargs)
+        client_error = False
+        for future in [None] + futures:
+            result = first
+            if future:
+                with stats.Stats.Timer() as timer:
+                    result = future.result()
+                runtime += timer.elapsed()
+
+            _, page_max, data, page_cache, status, page_stats = result
+            request_stats += page_stats
+            if status >= 400 and status < 500:
+                client_error = True
+            elif page_max < 1:
+                continue
+            elif callback:
+                callback(data, page_cache)
+            else:
+                if data:
+                    data_pages.append(data)
+                if page_cache:
+                    cache_pages.append(page_cache)
 
-                if status >= 400 and status < 500:
-                    return (None, None)
+        request_stats.update(stats.Stats.REQUEST, runtime=runtime)
+        worker_stats = worker.stats()
+        worker_stats += request_stats
 
-                if max_pages < 1:
-                    if num_errors >= self._ERROR_RETRIES:
-                        break
+        if client_error:
+            return (None, None)
 
-                    num_errors += 1
-                    time.sleep(0.5*num_errors)
-                    continue
+        return (data_pages, cache_pages)
 
-                if callback:
-                    callback(data, cache)
-                else:
-                    if data:
-                        data_pages.append(data)
-                    if cache:
-                        cache_pages.append(cache)
+    def __fetch_page(self, worker, number, needs_auth, func, *args, **kwargs):
+        page_stats = stats.Stats()
+        max_pages, data, page_cache, status = func(
+            self, worker, number, needs_auth, *args, **kwargs)
 
-                if current_page >= max_pages:
-                    break
-                current_page += 1
+        if max_pages < 1:
+            page_stats.update(stats.Stats.REQUEST, total=1, failure=1)
+        elif status == 304:
+            page_stats.update(stats.Stats.REQUEST, total=1)
+        else:
+            page_stats.update(stats.Stats.REQUEST, total=1, changed=1)
 
-        worker.stats().update(stats.Stats.REQUEST, runtime=timer.elapsed())
-        return (data_pages, cache_pages)
+        return (number, max_pages, data, page_cache, status, page_stats)
 
     def __fetch_api_page(self, worker, page, req_url, needs_auth, **kwargs):
         req_params = {'page': page.number}
         req_params.update(kwargs)
 
+        prev_etag = page.etag
         request, etag = self._fetch_api(
-            worker, req_url, req_params, page.etag, needs_auth)
+            worker, req_url, req_params, prev_etag, needs_auth)
         page.etag = etag
 
-        if not request or request.status_code >= 400:
-            worker.stats().update(stats.Stats.REQUEST, total=1, failure=1)
+        if request is None:
+            return (-1, None, 403)
+
+        if request.status_code >= 400:
             return (-1, None, request.status_code)
 
-        if 'x-pages' in request.headers:
-            max_pages = int(request.headers['x-pages'])
-        else:
-            max_pages = 1
+        max_pages = int(request.headers.get('x-pages', 1))
 
-        if request.status_code == 304:
-            worker.stats().update(stats.Stats.REQUEST, total=1)
-            return (max_pages, None, request.status_code)
+        if request.status_code == 304 or (prev_etag and etag == prev_etag):
+            return (max_pages, None, 304)
 
-        worker.stats().update(stats.Stats.REQUEST, total=1, changed=1)
-        return (max_pages, request.json(), request.status_code)
+        return (max_pages, json.loads(request.content), request.status_code)
@@ -0,0 +1,122 @@
+#
+# Copyright 2020 Taylor Petrick
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Disk backed cache for static ESI responses
+"""
+
+import os
+import sqlite3
+import threading
+
+try:
+    import orjson as json
+except ImportError:
+    import json
+
+class StaticCache():
+    """
+    Stores ESI response bodies and their etags in an SQLite database so that
+    static data can be revalidated with a 304 after a process restart.
+    """
+
+    # The name of the SQLite database file in the cache directory
+    __FILE_NAME = 'static.sqlite'
+
+    # Open caches keyed by directory, shared by every API instance
+    __instances = {}
+    __instances_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls, config):
+        """
+        Returns the shared cache for the configured directory, or None if the
+        static cache is disabled.
+
+        Args:
+            config: Configuration options containing the cache directory.
+        """
+
+        cache_dir = config.get('request', 'static_cache', fallback='')
+        if not cache_dir:
+            return None
+
+        with cls.__instances_lock:
+            if cache_dir not in cls.__instances:
+                cls.__instances[cache_dir] = StaticCache(cache_dir)
+            return cls.__instances[cache_dir]
+
+    def __init__(self, cache_dir):
+        """
+        Opens or creates the cache database in the specified directory.
+
+        Args:
+            cache_dir: The directory that contains the cache database.
+        """
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(
+            os.path.join(cache_dir, self.__FILE_NAME),
+            check_same_thread=False)
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS responses '
+            '(url TEXT PRIMARY KEY, etag TEXT, body BLOB)')
+        self.__connection.commit()
+
+    def get(self, url):
+        """
+        Returns the cached etag and decoded body for the specified URL.
+
+        Args:
+            url: The request URL to lookup.
+
+        Returns:
+            An (etag, data) pair, or None if the URL is not cached.
+        """
+
+        with self.__lock:
+            row = self.__connection.execute(
+                'SELECT etag, body FROM responses WHERE url = ?',
+                (url,)).fetchone()
+
+        if not row:
+            return None
+
+        return (row[0], json.loads(row[1]))
+
+    def put(self, url, etag, data):
+        """
+        Stores the etag and body for the specified URL.
+
+        Args:
+            url: The request URL.
+            etag: The etag returned by ESI for the response.
+            data: The decoded response body.
+        """
+
+        with self.__lock:
+            self.__connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?)',
+                (url, etag, json.dumps(data)))
+            self.__connection.commit()
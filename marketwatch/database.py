@@ -41,6 +41,19 @@ class Database():
 
         raise NotImplementedError
 
+    def pipeline(self, worker):
+        """
+        Returns a context manager yielding a pipeline that the add_*, set_*
+        and refresh_* methods can queue writes on. The queued writes are sent
+        together when the context exits. Writers that replace a list or set
+        do not accept this pipeline and use a MULTI/EXEC pipeline of their own.
+
+        Args:
+            worker: The marketwatch.worker.Worker containing local state.
+        """
+
+        raise NotImplementedError
+
     def set_regions(self, worker, region_ids):
         """
         Stores the specified region IDs to a set in the database.
@@ -52,13 +65,14 @@ class Database():
 
         raise NotImplementedError
 
-    def add_region_info(self, worker, region_infos):
+    def add_region_info(self, worker, region_infos, pipeline=None):
         """
         Adds the specified region infos to the database.
 
         Args:
             worker: The marketwatch.worker.Worker containing local state.
             region_infos: The list of region info fields to add.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         raise NotImplementedError
@@ -75,13 +89,14 @@ class Database():
 
         raise NotImplementedError
 
-    def add_system_info(self, worker, system_infos):
+    def add_system_info(self, worker, system_infos, pipeline=None):
         """
         Adds the specified region infos to the database.
 
         Args:
             worker: The marketwatch.worker.Worker containing local state.
             region_infos: The list of region info fields to add.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         raise NotImplementedError
@@ -98,13 +113,14 @@ class Database():
 
         raise NotImplementedError
 
-    def add_location_info(self, worker, location_infos):
+    def add_location_info(self, worker, location_infos, pipeline=None):
         """
         Adds the specified location infos to the database.
 
         Args:
             worker: The marketwatch.worker.Worker containing local state.
             location_infos: The list of location info fields to add.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         raise NotImplementedError
@@ -133,7 +149,7 @@ class Database():
 
         raise NotImplementedError
 
-    def add_orders(self, worker, region_id, orders):
+    def add_orders(self, worker, region_id, orders, pipeline=None):
         """
         Adds the orders to the database and the matching region::type set for
         the order.
@@ -142,11 +158,12 @@ class Database():
             worker: The marketwatch.worker.Worker containing local state.
             region_id: The region ID that the order(s) are listed in.
             orders: The list of market order fields to add.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         raise NotImplementedError
 
-    def refresh_orders(self, worker, order_ids):
+    def refresh_orders(self, worker, order_ids, pipeline=None):
         """
         Refreshes the orders with the specified IDs. This only affects the
         TTL value for existing order keys -- this method does not add any
@@ -155,6 +172,35 @@ class Database():
         Args:
             worker: The marketwatch.worker.Worker containing local state.
             order_ids: The list of market order IDs that need a TTL refresh
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
+        """
+
+        raise NotImplementedError
+
+    def set_order_pages(self, worker, region_id, pages, pipeline=None):
+        """
+        Stores ESI order page etags and cached order IDs for the specified
+        region.
+
+        Args:
+            worker: The marketwatch.worker.Worker containing local state.
+            region_id: The region ID that the pages belong to.
+            pages: A dict of page key -> (etag, order IDs) pairs.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
+        """
+
+        raise NotImplementedError
+
+    def get_order_pages(self, region_id):
+        """
+        Queries the ESI order page etags and cached order IDs stored for the
+        specified region.
+
+        Args:
+            region_id: The region ID to lookup in the database.
+
+        Returns:
+            A dict of page key -> (etag, order IDs) pairs.
         """
 
         raise NotImplementedError
@@ -182,6 +228,20 @@ class Database():
 
         raise NotImplementedError
 
+    def get_region_infos(self, region_ids):
+        """
+        Queries region info for each of the specified IDs in a single round
+        trip.
+
+        Args:
+            region_ids: The region IDs to lookup in the database.
+
+        Returns:
+            The list of region infos, in the same order as the IDs.
+        """
+
+        raise NotImplementedError
+
     def get_systems(self, region_id):
         """
         Queries the list of system IDs for the given region ID.
@@ -208,6 +268,20 @@ class Database():
 
         raise NotImplementedError
 
+    def get_system_infos(self, system_ids):
+        """
+        Queries system info for each of the specified IDs in a single round
+        trip.
+
+        Args:
+            system_ids: The system IDs to lookup in the database.
+
+        Returns:
+            The list of system infos, in the same order as the IDs.
+        """
+
+        raise NotImplementedError
+
     def get_locations(self, region_id):
         """
         Queries the list of locatons IDs for the given region ID.
@@ -234,6 +308,20 @@ class Database():
 
         raise NotImplementedError
 
+    def get_location_infos(self, location_ids):
+        """
+        Queries location info for each of the specified IDs in a single round
+        trip.
+
+        Args:
+            location_ids: The location IDs to lookup in the database.
+
+        Returns:
+            The list of location infos, in the same order as the IDs.
+        """
+
+        raise NotImplementedError
+
     def get_groups(self):
         """
         Queries all market group IDs.
@@ -257,6 +345,20 @@ class Database():
 
         raise NotImplementedError
 
+    def get_group_infos(self, group_ids):
+        """
+        Queries market group info for each of the specified IDs in a single
+        round trip.
+
+        Args:
+            group_ids: The market group IDs to lookup in the database.
+
+        Returns:
+            The list of market group infos, in the same order as the IDs.
+        """
+
+        raise NotImplementedError
+
     def get_orders(self, region_id, type_id, orders=None):
         """
         Queries market orders for the specified region ID and type ID.
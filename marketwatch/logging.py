@@ -24,42 +24,124 @@
 Utilities for creating and interacting with log files
 """
 
+import atexit
 import logging
 import os
+import queue
 
 from logging import StreamHandler
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
 from logging.handlers import RotatingFileHandler
+from logging.handlers import WatchedFileHandler
 
 class Logging():
     """
     Utilities for creating log files on disk
     """
 
+    # The formatter shared by every log handler
+    __FORMATTER = logging.Formatter(
+        '[%(levelname)s]: %(asctime)s -- %(message)s')
+
+    # Log directories that have already been created
+    __created_dirs = set()
+
+    # The queue that every log's records are written to, and the handlers
+    # for each log name that the queue listener writes them with
+    __queue = queue.SimpleQueue()
+    __handlers = {}
+
+    # The listener thread shared by every log, started by the first create
+    __listener = None
+
+    class LogQueueHandler(QueueHandler):
+        """
+        Queues records along with the name of the log that they belong to.
+        """
+
+        def __init__(self, log_queue, log_name):
+            """
+            Constructs a handler that queues records for the named log.
+
+            Args:
+                log_queue: The queue that records are written to.
+                log_name: The name of the log that owns the handler.
+            """
+
+            QueueHandler.__init__(self, log_queue)
+            self.__log_name = log_name
+
+        def enqueue(self, record):
+            self.queue.put_nowait((self.__log_name, record))
+
+    class LogQueueListener(QueueListener):
+        """
+        Writes queued records with the handlers of the log they belong to.
+        """
+
+        def __init__(self, log_queue, handlers):
+            """
+            Constructs a listener that writes records from the queue.
+
+            Args:
+                log_queue: The queue that records are read from.
+                handlers: A dict of log name -> list of handlers.
+            """
+
+            QueueListener.__init__(self, log_queue)
+            self.__log_handlers = handlers
+
+        def handle(self, item):
+            log_name, record = item
+            record = self.prepare(record)
+            for handler in self.__log_handlers[log_name]:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
     @classmethod
     def create(cls, config, log_name, log_file):
         """
         Creates a rolling log
         """
 
-        os.makedirs(config.get('logging', 'dir'), exist_ok=True)
-
         log = logging.getLogger(log_name)
+        if log.handlers:
+            return log
+
         log.setLevel(logging.INFO)
 
-        formatter = logging.Formatter(
-            '[%(levelname)s]: %(asctime)s -- %(message)s')
+        log_dir = config.get('logging', 'dir')
+        if log_dir not in cls.__created_dirs:
+            os.makedirs(log_dir, exist_ok=True)
+            cls.__created_dirs.add(log_dir)
 
-        handler = RotatingFileHandler(
-            '{}/{}.log'.format(config.get('logging', 'dir'), log_file),
-            maxBytes = config.getint('logging', 'roll_size'),
-            backupCount = config.getint('logging', 'roll_count'))
-        handler.setFormatter(formatter)
-        log.addHandler(handler)
+        log_path = '{}/{}.log'.format(log_dir, log_file)
+        if config.getboolean('logging', 'external_rotate', fallback=False):
+            # Rotation is left to an external tool such as logrotate, which
+            # avoids a size check on every record
+            handler = WatchedFileHandler(log_path, delay=True)
+        else:
+            handler = RotatingFileHandler(
+                log_path,
+                maxBytes = config.getint('logging', 'roll_size'),
+                backupCount = config.getint('logging', 'roll_count'))
+        handler.setFormatter(cls.__FORMATTER)
+        handlers = [handler]
 
         if config.getboolean('logging', 'shell'):
             error_handler = StreamHandler()
             error_handler.setLevel(logging.ERROR)
-            error_handler.setFormatter(formatter)
-            log.addHandler(error_handler)
+            error_handler.setFormatter(cls.__FORMATTER)
+            handlers.append(error_handler)
+
+        # Records are queued by the logging thread and written by a single
+        # listener thread, so worker threads never block on file or console I/O
+        cls.__handlers[log_name] = handlers
+        if cls.__listener is None:
+            cls.__listener = cls.LogQueueListener(cls.__queue, cls.__handlers)
+            cls.__listener.start()
+            atexit.register(cls.__listener.stop)
+        log.addHandler(cls.LogQueueHandler(cls.__queue, log_name))
 
         return log
@@ -24,8 +24,16 @@
 Redis database interface
 """
 
+import calendar
+import collections
+import contextlib
 import datetime
+import operator
 import redis
+import threading
+import time
+
+from array import array
 
 from . import database
 from . import stats
@@ -94,14 +102,72 @@ class RedisDatabase(database.Database):
     # The key expiry in seconds for market orders
     __MARKET_ORDER_TTL      = 1200
 
+    # Lua script that refreshes the TTL of every key passed to it, so that a
+    # batch of order refreshes is a single command
+    __REFRESH_SCRIPT        = """
+        for i = 1, #KEYS do
+            redis.call('EXPIRE', KEYS[i], ARGV[1])
+        end
+    """
+
+    # Lua script that stores each encoded order with the order TTL and adds
+    # it to its region::type set. KEYS alternate order ID and set name, and
+    # ARGV holds the TTL followed by the encoded orders
+    __ADD_SCRIPT            = """
+        for i = 1, #KEYS / 2 do
+            redis.call('SET', KEYS[2 * i - 1], ARGV[i + 1], 'EX', ARGV[1])
+            redis.call('SADD', KEYS[2 * i], KEYS[2 * i - 1])
+        end
+    """
+
+    # Lua script that returns each live order in a region::type set followed
+    # by its TTL, and removes the IDs of expired orders from the set
+    __GET_SCRIPT            = """
+        local orders = {}
+        local expired = {}
+        for _, order_id in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+            local order = redis.call('GET', order_id)
+            if order then
+                orders[#orders + 1] = order
+                orders[#orders + 1] = redis.call('TTL', order_id)
+            else
+                expired[#expired + 1] = order_id
+            end
+        end
+        for i = 1, #expired, 1000 do
+            redis.call('SREM', KEYS[1],
+                unpack(expired, i, math.min(i + 999, #expired)))
+        end
+        return orders
+    """
+
+    # The maximum number of keys passed to a single script call
+    __SCRIPT_KEYS_MAX       = 5000
+
+    # Recently read region, system, type and market group infos, keyed by
+    # server address, database number and hash key. Writes from this process
+    # evict the matching entries, and each entry expires after a short TTL so
+    # that other processes pick up the static refresh
+    __info_cache = collections.OrderedDict()
+    __info_cache_lock = threading.Lock()
+
+    # Connection pools keyed by server address and database number, shared by
+    # every instance so that threads reuse open sockets instead of connecting
+    # per instance
+    __pools = {}
+    __pools_lock = threading.Lock()
+
 
     # The key format for the Redis SET containing market order IDs for the
     # matching region and item type ID
     __REGION_TYPE_SET       = 'rt:{}:{}'
 
-    # The time format used in market orders to specify the date/time that the
-    # order was listed
-    __TIME_FORMAT           = '%Y-%m-%dT%H:%M:%SZ'
+    # The key format for the Redis HASH containing the ESI order page etags
+    # and cached order IDs for the matching region ID
+    __REGION_PAGE_KEY       = 'rp:{}'
+
+    # The number of seconds in a day, used to convert order durations
+    __SECONDS_PER_DAY       = 86400
 
 
     # Field names -> types from a region info API request that should
@@ -160,6 +226,19 @@ class RedisDatabase(database.Database):
         ('range'            , 'range'   , str),
     ]
 
+    # Extracts the stored market order fields from an API order, in the order
+    # that they are encoded
+    __ORDER_GETTER = operator.itemgetter(*[key for key, _, _ in __ORDER_FIELDS])
+
+    # The types of the stored market order fields, in encoding order
+    __ORDER_TYPES = tuple(field_type for _, _, field_type in __ORDER_FIELDS)
+
+    # The stored names and types of each encoded market order component,
+    # including the trailing expiry time
+    __ORDER_DECODE = tuple(
+        (field_name, field_type) for _, field_name, field_type in __ORDER_FIELDS
+    ) + (('expiry', int),)
+
     def __init__(self, config, db):
         """
         Constructs a new database connection.
@@ -170,21 +249,24 @@ class RedisDatabase(database.Database):
 
         database.Database.__init__(self)
 
-        socket = config.get('database', 'unixsocket')
-        if socket:
-            pool = redis.ConnectionPool(
-                connection_class=redis.UnixDomainSocketConnection,
-                path=socket,
-                decode_responses=True)
-            self.__connection = redis.Redis(
-                connection_pool=pool,
-                db = db)
-        else:
-            self.__connection = redis.StrictRedis(
-                host = config.get('database', 'host'),
-                port = config.getint('database', 'port'),
-                db = db,
-                decode_responses=True)
+        self.__server_key = self.__server_name(config, db)
+        self.__connection = redis.Redis(
+            connection_pool=self.__connection_pool(config, db))
+        self.__add_script = self.__connection.register_script(
+            self.__ADD_SCRIPT)
+        self.__get_script = self.__connection.register_script(
+            self.__GET_SCRIPT)
+        self.__refresh_script = self.__connection.register_script(
+            self.__REFRESH_SCRIPT)
+        self.__info_cache_size = config.getint(
+            'database', 'info_cache_size', fallback=4096)
+        self.__info_cache_ttl = config.getint(
+            'database', 'info_cache_ttl', fallback=300)
+
+        # Stored order pages must expire before the orders refreshed earliest
+        # in an update, so they are kept for one update interval less
+        self.__order_page_ttl = (
+            self.__MARKET_ORDER_TTL - config.getint('job', 'update_rate'))
 
     def set_universe_cache_expiry(self, modify, expire):
         """
@@ -230,6 +312,33 @@ class RedisDatabase(database.Database):
 
         return self.__get_cache_expiry(self.__MARKET_GROUP_CACHE)
 
+    @contextlib.contextmanager
+    def pipeline(self, worker):
+        """
+        Returns a context manager yielding a pipeline that the add_*, set_*
+        and refresh_* methods can queue writes on. The queued writes are sent
+        together when the context exits. Writers that replace a list or set
+        do not accept this pipeline and use a MULTI/EXEC pipeline of their own.
+
+        Args:
+            worker: The marketwatch.worker.Worker containing local state.
+        """
+
+        with self.__connection.pipeline(transaction=False) as conn:
+            # Info hashes queued on this pipeline are only evicted from the
+            # info cache once their writes have been sent
+            conn.__evict_keys = []
+            yield conn
+
+            # The writers only time queueing their commands, so the round
+            # trip is timed here
+            with stats.Stats.Timer() as timer:
+                conn.execute()
+
+            self.__evict_infos(conn.__evict_keys)
+
+        worker.stats().update(stats.Stats.UPDATE, runtime=timer.elapsed())
+
     def set_regions(self, worker, region_ids):
         """
         Stores the specified region IDs to a set in the database.
@@ -240,10 +349,9 @@ class RedisDatabase(database.Database):
         """
 
         with stats.Stats.Timer() as timer:
-            with self.__connection.pipeline() as conn:
+            with self.__pipeline(transaction=True) as conn:
                 conn.delete(self.__REGION_LIST)
                 conn.rpush(self.__REGION_LIST, *region_ids)
-                conn.execute()
 
         worker.stats().update(
             stats.Stats.UPDATE,
@@ -251,13 +359,14 @@ class RedisDatabase(database.Database):
             changed=len(region_ids),
             runtime=timer.elapsed())
 
-    def add_region_info(self, worker, region_infos):
+    def add_region_info(self, worker, region_infos, pipeline=None):
         """
         Adds the specified region infos to the database.
 
         Args:
             worker: The marketwatch.worker.Worker containing local state.
             region_infos: The list of region info fields to add.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         self.__add_infos(
@@ -265,7 +374,8 @@ class RedisDatabase(database.Database):
             region_infos,
             self.__REGION_FIELDS,
             'region_id',
-            self.__region_info_name)
+            self.__region_info_name,
+            pipeline)
 
     def set_region_systems(self, worker, region_id, system_ids):
         """
@@ -278,11 +388,10 @@ class RedisDatabase(database.Database):
         """
 
         with stats.Stats.Timer() as timer:
-            with self.__connection.pipeline() as conn:
+            with self.__pipeline(transaction=True) as conn:
                 system_key = self.__region_system_name(region_id)
                 conn.delete(system_key)
                 conn.rpush(system_key, *system_ids)
-                conn.execute()
 
         worker.stats().update(
             stats.Stats.UPDATE,
@@ -290,13 +399,14 @@ class RedisDatabase(database.Database):
             changed=len(system_ids),
             runtime=timer.elapsed())
 
-    def add_system_info(self, worker, system_infos):
+    def add_system_info(self, worker, system_infos, pipeline=None):
         """
         Adds the specified region infos to the database.
 
         Args:
             worker: The marketwatch.worker.Worker containing local state.
             region_infos: The list of region info fields to add.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         self.__add_infos(
@@ -304,7 +414,8 @@ class RedisDatabase(database.Database):
             system_infos,
             self.__SYSTEM_FIELDS,
             'system_id',
-            self.__system_info_name)
+            self.__system_info_name,
+            pipeline)
 
     def add_region_locations(self, worker, region_id, location_ids):
         """
@@ -317,11 +428,10 @@ class RedisDatabase(database.Database):
         """
 
         with stats.Stats.Timer() as timer:
-            with self.__connection.pipeline() as conn:
+            with self.__pipeline(transaction=True) as conn:
                 location_key = self.__region_location_name(region_id)
                 conn.delete(location_key)
                 conn.rpush(location_key, *location_ids)
-                conn.execute()
 
         worker.stats().update(
             stats.Stats.UPDATE,
@@ -340,11 +450,10 @@ class RedisDatabase(database.Database):
         """
 
         with stats.Stats.Timer() as timer:
-            with self.__connection.pipeline() as conn:
+            with self.__pipeline(transaction=True) as conn:
                 structure_key = self.__region_structure_name(region_id)
                 conn.delete(structure_key)
                 conn.sadd(structure_key, *structure_ids)
-                conn.execute()
 
         worker.stats().update(
             stats.Stats.UPDATE,
@@ -352,13 +461,14 @@ class RedisDatabase(database.Database):
             changed=len(structure_ids),
             runtime=timer.elapsed())
 
-    def add_location_info(self, worker, location_infos):
+    def add_location_info(self, worker, location_infos, pipeline=None):
         """
         Adds the specified location infos to the database.
 
         Args:
             worker: The marketwatch.worker.Worker containing local state.
             location_infos: The list of location info fields to add.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         self.__add_infos(
@@ -366,15 +476,17 @@ class RedisDatabase(database.Database):
             location_infos,
             self.__LOCATION_FIELDS,
             'station_id',
-            self.__location_info_name)
+            self.__location_info_name,
+            pipeline)
 
-    def add_type_info(self, worker, type_infos):
+    def add_type_info(self, worker, type_infos, pipeline=None):
         """
         Adds the specified type infos to the database.
 
         Args:
             worker: The marketwatch.worker.Worker containing local state.
             type_infos: The list of type info fields to add.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         self.__add_infos(
@@ -382,7 +494,8 @@ class RedisDatabase(database.Database):
             type_infos,
             self.__TYPE_FIELDS,
             'type_id',
-            self.__type_info_name)
+            self.__type_info_name,
+            pipeline)
 
     def set_market_groups(self, worker, group_ids):
         """
@@ -394,10 +507,9 @@ class RedisDatabase(database.Database):
         """
 
         with stats.Stats.Timer() as timer:
-            with self.__connection.pipeline() as conn:
+            with self.__pipeline(transaction=True) as conn:
                 conn.delete(self.__MARKET_GROUP_LIST)
                 conn.rpush(self.__MARKET_GROUP_LIST, *group_ids)
-                conn.execute()
 
         worker.stats().update(
             stats.Stats.UPDATE,
@@ -416,7 +528,7 @@ class RedisDatabase(database.Database):
         """
 
         with stats.Stats.Timer() as timer:
-            with self.__connection.pipeline() as conn:
+            with self.__pipeline(transaction=True) as conn:
                 for group_info in group_infos:
                     group_id = group_info['market_group_id']
                     group_hash = self.__group_info_name(group_id)
@@ -435,7 +547,9 @@ class RedisDatabase(database.Database):
                     else:
                         conn.hset(group_hash, 'hastypes', 0)
 
-                conn.execute()
+        self.__evict_infos(
+            [self.__group_info_name(info['market_group_id'])
+             for info in group_infos])
 
         worker.stats().update(
             stats.Stats.UPDATE,
@@ -443,7 +557,7 @@ class RedisDatabase(database.Database):
             changed=len(group_infos),
             runtime=timer.elapsed())
 
-    def add_orders(self, worker, region_id, orders):
+    def add_orders(self, worker, region_id, orders, pipeline=None):
         """
         Adds the orders to the database and the matching region::type set for
         the order.
@@ -452,27 +566,30 @@ class RedisDatabase(database.Database):
             worker: The marketwatch.worker.Worker containing local state.
             region_id: The region ID that the order(s) are listed in.
             orders: The list of market order fields to add.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         with stats.Stats.Timer() as timer:
-            with self.__connection.pipeline() as conn:
-                for order in orders:
-                    order_id = order['order_id']
-
-                    conn.set(order_id, self.__encode_order(order))
-                    conn.expire(order_id, self.__MARKET_ORDER_TTL)
-                    conn.sadd(
-                        self.__type_set_name(region_id, order['type_id']),
-                        order_id)
-                conn.execute()
+            with self.__pipeline(pipeline) as conn:
+                chunk_size = self.__SCRIPT_KEYS_MAX // 2
+                for start in range(0, len(orders), chunk_size):
+                    keys = []
+                    args = [self.__MARKET_ORDER_TTL]
+                    for order in orders[start:start + chunk_size]:
+                        keys.append(order['order_id'])
+                        keys.append(
+                            self.__type_set_name(region_id, order['type_id']))
+                        args.append(self.__encode_order(order))
+
+                    self.__add_script(keys=keys, args=args, client=conn)
 
         worker.stats().update(
             stats.Stats.UPDATE,
-            total=len(orders)*3,
-            changed=len(orders)*3,
+            total=len(orders)*2,
+            changed=len(orders)*2,
             runtime=timer.elapsed())
 
-    def refresh_orders(self, worker, order_ids):
+    def refresh_orders(self, worker, order_ids, pipeline=None):
         """
         Refreshes the orders with the specified IDs. This only affects the
         TTL value for existing order keys -- this method does not add any
@@ -481,13 +598,17 @@ class RedisDatabase(database.Database):
         Args:
             worker: The marketwatch.worker.Worker containing local state.
             order_ids: The list of market order IDs that need a TTL refresh
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
         """
 
         with stats.Stats.Timer() as timer:
-            with self.__connection.pipeline() as conn:
-                for order_id in order_ids:
-                    conn.expire(order_id, self.__MARKET_ORDER_TTL)
-                conn.execute()
+            with self.__pipeline(pipeline) as conn:
+                for start in range(0, len(order_ids), self.__SCRIPT_KEYS_MAX):
+                    self.__refresh_script(
+                        keys=list(
+                            order_ids[start:start + self.__SCRIPT_KEYS_MAX]),
+                        args=[self.__MARKET_ORDER_TTL],
+                        client=conn)
 
         worker.stats().update(
             stats.Stats.UPDATE,
@@ -495,6 +616,70 @@ class RedisDatabase(database.Database):
             changed=len(order_ids),
             runtime=timer.elapsed())
 
+    def set_order_pages(self, worker, region_id, pages, pipeline=None):
+        """
+        Stores ESI order page etags and cached order IDs for the specified
+        region. The stored pages expire one update interval before the market
+        orders, so that a restarted watcher never trusts an etag whose orders
+        have expired.
+
+        Args:
+            worker: The marketwatch.worker.Worker containing local state.
+            region_id: The region ID that the pages belong to.
+            pages: A dict of page key -> (etag, order IDs) pairs.
+            pipeline: Optional pipeline from pipeline() to queue the writes on.
+        """
+
+        with stats.Stats.Timer() as timer:
+            with self.__pipeline(pipeline) as conn:
+                page_key = self.__region_page_name(region_id)
+
+                page_fields = {}
+                for key, (etag, order_ids) in pages.items():
+                    page_fields[key + ':e'] = etag
+                    page_fields[key + ':c'] = ','.join(map(str, order_ids))
+
+                if self.__order_page_ttl <= 0:
+                    conn.delete(page_key)
+                else:
+                    if page_fields:
+                        conn.hset(page_key, mapping=page_fields)
+                    conn.expire(page_key, self.__order_page_ttl)
+
+        worker.stats().update(
+            stats.Stats.UPDATE,
+            total=len(pages),
+            changed=len(pages),
+            runtime=timer.elapsed())
+
+    def get_order_pages(self, region_id):
+        """
+        Queries the ESI order page etags and cached order IDs stored for the
+        specified region.
+
+        Args:
+            region_id: The region ID to lookup in the database.
+
+        Returns:
+            A dict of page key -> (etag, order IDs) pairs.
+        """
+
+        page_fields = self.__connection.hgetall(
+            self.__region_page_name(region_id))
+
+        pages = {}
+        for field, value in page_fields.items():
+            key, kind = field.rsplit(':', 1)
+            if kind != 'e' or key + ':c' not in page_fields:
+                continue
+
+            order_ids = page_fields[key + ':c']
+            pages[key] = (
+                value,
+                array('Q', map(int, order_ids.split(','))) if order_ids else None)
+
+        return pages
+
     def get_regions(self):
         """
         Queries the list of region IDs.
@@ -504,7 +689,7 @@ class RedisDatabase(database.Database):
         """
 
         region_ids = self.__connection.lrange(self.__REGION_LIST, 0, -1)
-        return [int(region_id) for region_id in region_ids]
+        return list(map(int, region_ids))
 
     def get_region_info(self, region_id):
         """
@@ -517,10 +702,23 @@ class RedisDatabase(database.Database):
             The region info for the specified ID.
         """
 
-        region_info = self.__cast_fields(
-            self.__REGION_FIELDS,
-            self.__connection.hgetall(self.__region_info_name(region_id)))
-        return region_info
+        return self.__get_info(
+            self.__REGION_FIELDS, self.__region_info_name(region_id))
+
+    def get_region_infos(self, region_ids):
+        """
+        Queries region info for each of the specified IDs in a single round
+        trip.
+
+        Args:
+            region_ids: The region IDs to lookup in the database.
+
+        Returns:
+            The list of region infos, in the same order as the IDs.
+        """
+
+        return self.__get_infos(
+            region_ids, self.__REGION_FIELDS, self.__region_info_name)
 
     def get_systems(self, region_id):
         """
@@ -535,7 +733,7 @@ class RedisDatabase(database.Database):
 
         system_ids = self.__connection.lrange(
             self.__region_system_name(region_id), 0, -1)
-        return [int(system_id) for system_id in system_ids]
+        return list(map(int, system_ids))
 
     def get_system_info(self, system_id):
         """
@@ -548,10 +746,23 @@ class RedisDatabase(database.Database):
             The system info for the specified ID.
         """
 
-        system_info = self.__cast_fields(
-            self.__SYSTEM_FIELDS,
-            self.__connection.hgetall(self.__system_info_name(system_id)))
-        return system_info
+        return self.__get_info(
+            self.__SYSTEM_FIELDS, self.__system_info_name(system_id))
+
+    def get_system_infos(self, system_ids):
+        """
+        Queries system info for each of the specified IDs in a single round
+        trip.
+
+        Args:
+            system_ids: The system IDs to lookup in the database.
+
+        Returns:
+            The list of system infos, in the same order as the IDs.
+        """
+
+        return self.__get_infos(
+            system_ids, self.__SYSTEM_FIELDS, self.__system_info_name)
 
     def get_locations(self, region_id):
         """
@@ -566,7 +777,7 @@ class RedisDatabase(database.Database):
 
         location_ids = self.__connection.lrange(
             self.__region_location_name(region_id), 0, -1)
-        return [int(location_id) for location_id in location_ids]
+        return list(map(int, location_ids))
 
     def get_structures(self, region_id):
         """
@@ -581,7 +792,7 @@ class RedisDatabase(database.Database):
 
         structure_ids = self.__connection.smembers(
             self.__region_structure_name(region_id))
-        return [int(structure_id) for structure_id in structure_ids]
+        return list(map(int, structure_ids))
 
     def get_location_info(self, location_id):
         """
@@ -599,6 +810,21 @@ class RedisDatabase(database.Database):
             self.__connection.hgetall(self.__location_info_name(location_id)))
         return location_info
 
+    def get_location_infos(self, location_ids):
+        """
+        Queries location info for each of the specified IDs in a single round
+        trip.
+
+        Args:
+            location_ids: The location IDs to lookup in the database.
+
+        Returns:
+            The list of location infos, in the same order as the IDs.
+        """
+
+        return self.__get_infos(
+            location_ids, self.__LOCATION_FIELDS, self.__location_info_name)
+
     def get_types(self):
         """
         Queries the list of type IDs.
@@ -608,7 +834,7 @@ class RedisDatabase(database.Database):
         """
 
         type_ids = self.__connection.lrange(self.__TYPE_LIST_KEY, 0, -1)
-        return [int(type_id) for type_id in type_ids]
+        return list(map(int, type_ids))
 
     def get_type_info(self, type_id):
         """
@@ -621,10 +847,23 @@ class RedisDatabase(database.Database):
             The type info for the specified ID.
         """
 
-        type_info = self.__cast_fields(
-            self.__TYPE_FIELDS,
-            self.__connection.hgetall(self.__type_info_name(type_id)))
-        return type_info
+        return self.__get_info(
+            self.__TYPE_FIELDS, self.__type_info_name(type_id))
+
+    def get_type_infos(self, type_ids):
+        """
+        Queries type info for each of the specified IDs in a single round
+        trip.
+
+        Args:
+            type_ids: The type IDs to lookup in the database.
+
+        Returns:
+            The list of type infos, in the same order as the IDs.
+        """
+
+        return self.__get_infos(
+            type_ids, self.__TYPE_FIELDS, self.__type_info_name)
 
     def get_groups(self):
         """
@@ -635,7 +874,7 @@ class RedisDatabase(database.Database):
         """
 
         group_ids = self.__connection.lrange(self.__MARKET_GROUP_LIST, 0, -1)
-        return [int(group_id) for group_id in group_ids]
+        return list(map(int, group_ids))
 
     def get_group_info(self, group_id):
         """
@@ -648,9 +887,23 @@ class RedisDatabase(database.Database):
             The market group info for the specified ID.
         """
 
-        return self.__cast_fields(
-            self.__MARKET_GROUP_FIELDS,
-            self.__connection.hgetall(self.__group_info_name(group_id)))
+        return self.__get_info(
+            self.__MARKET_GROUP_FIELDS, self.__group_info_name(group_id))
+
+    def get_group_infos(self, group_ids):
+        """
+        Queries market group info for each of the specified IDs in a single
+        round trip.
+
+        Args:
+            group_ids: The market group IDs to lookup in the database.
+
+        Returns:
+            The list of market group infos, in the same order as the IDs.
+        """
+
+        return self.__get_infos(
+            group_ids, self.__MARKET_GROUP_FIELDS, self.__group_info_name)
 
     def get_group_types(self, group_id):
         """
@@ -681,42 +934,63 @@ class RedisDatabase(database.Database):
             region.
         """
 
-        set_name = self.__type_set_name(region_id, type_id)
-        order_ids = list(self.__connection.smembers(set_name))
-
         if orders is None:
             orders = []
 
-        remove_ids = []
+        results = self.__get_script(
+            keys=[self.__type_set_name(region_id, type_id)])
 
-        with self.__connection.pipeline() as conn:
-            for order_id in order_ids:
-                conn.get(order_id)
-                conn.ttl(order_id)
-            results = conn.execute()
+        for index in range(0, len(results), 2):
+            order_fields = self.__decode_order(results[index])
+            if not system_id or order_fields['sid'] == system_id:
+                ttl = results[index+1]
+                order_fields['age'] = (self.__MARKET_ORDER_TTL - ttl)
+                order_fields['rid'] = region_id
+                orders.append(order_fields)
 
-        index = 0
-        order_index = 0
-        while index < len(results):
-            if not results[index]:
-                remove_ids.append(order_ids[order_index])
+        return orders
+
+    @classmethod
+    def __server_name(cls, config, db):
+        return (
+            config.get('database', 'unixsocket', fallback=''),
+            config.get('database', 'host'),
+            config.getint('database', 'port'),
+            db)
+
+    @classmethod
+    def __connection_pool(cls, config, db):
+        pool_key = cls.__server_name(config, db)
+        socket, host, port, _ = pool_key
+        with cls.__pools_lock:
+            if pool_key in cls.__pools:
+                return cls.__pools[pool_key]
+
+            pool_args = {
+                'db': db,
+                'decode_responses': True,
+                'max_connections': config.getint(
+                    'database', 'pool_size', fallback=8),
+                'timeout': config.getint(
+                    'database', 'pool_timeout', fallback=20)
+            }
+
+            if socket:
+                pool_args['connection_class'] = redis.UnixDomainSocketConnection
+                pool_args['path'] = socket
             else:
-                order_fields = self.__decode_order(results[index])
-                if not system_id or order_fields['sid'] == system_id:
-                    ttl = results[index+1]
-                    order_fields['age'] = (self.__MARKET_ORDER_TTL - ttl)
-                    order_fields['rid'] = region_id
-                    orders.append(order_fields)
-
-            order_index += 1
-            index += 2
-
-        with self.__connection.pipeline() as conn:
-            for remove_id in remove_ids:
-                conn.srem(set_name, remove_id)
-            conn.execute()
+                pool_args['host'] = host
+                pool_args['port'] = port
+                pool_args['socket_keepalive'] = True
 
-        return orders
+            socket_timeout = config.getint(
+                'database', 'socket_timeout', fallback=30)
+            if socket_timeout > 0:
+                pool_args['socket_timeout'] = socket_timeout
+
+            pool = redis.BlockingConnectionPool(**pool_args)
+            cls.__pools[pool_key] = pool
+            return pool
 
     @classmethod
     def __region_info_name(cls, region_id):
@@ -758,6 +1032,10 @@ class RedisDatabase(database.Database):
     def __type_set_name(cls, region_id, type_id):
         return cls.__REGION_TYPE_SET.format(region_id, type_id)
 
+    @classmethod
+    def __region_page_name(cls, region_id):
+        return cls.__REGION_PAGE_KEY.format(region_id)
+
     @classmethod
     def __extract_fields(cls, field_spec, field_dict):
         fields = {}
@@ -774,40 +1052,30 @@ class RedisDatabase(database.Database):
                 fields[field_name] = field_type(field_dict[field_name])
         return fields
 
-    @classmethod
-    def __encode_fields(cls, field_dict):
-        return ':'.join([str(field) for _, field in field_dict.items()])
-
-    @classmethod
-    def __decode_fields(cls, field_spec, field_string, **kwargs):
-        field_components = field_string.split(':')
-        decoded_fields = {}
-
-        index = 0
-        for _, field_name, field_type in field_spec:
-            decoded_fields[field_name] = field_type(field_components[index])
-            index += 1
-
-        for field_name, field_type in kwargs.items():
-            decoded_fields[field_name] = field_type(field_components[index])
-            index += 1
-
-        return decoded_fields
-
     @classmethod
     def __encode_order(cls, order_dict):
-        order_fields = cls.__extract_fields(cls.__ORDER_FIELDS, order_dict)
-
-        issued = datetime.datetime.strptime(
-            order_dict['issued'], cls.__TIME_FORMAT)
-        issued += datetime.timedelta(int(order_dict['duration']))
-        order_fields['expiry'] = int(issued.timestamp())
-
-        return cls.__encode_fields(order_fields)
+        # The issued time is always UTC in the fixed YYYY-MM-DDTHH:MM:SSZ
+        # format, so it is sliced directly rather than parsed by strptime
+        issued = order_dict['issued']
+        expiry = calendar.timegm((
+            int(issued[0:4]), int(issued[5:7]), int(issued[8:10]),
+            int(issued[11:13]), int(issued[14:16]), int(issued[17:19])))
+        expiry += int(order_dict['duration']) * cls.__SECONDS_PER_DAY
+
+        order_fields = [
+            str(field_type(field))
+            for field_type, field in zip(
+                cls.__ORDER_TYPES, cls.__ORDER_GETTER(order_dict))]
+        order_fields.append(str(expiry))
+
+        return ':'.join(order_fields)
 
     @classmethod
     def __decode_order(cls, order_string):
-        return cls.__decode_fields(cls.__ORDER_FIELDS, order_string, expiry=int)
+        return {
+            field_name: field_type(component)
+            for (field_name, field_type), component in zip(
+                cls.__ORDER_DECODE, order_string.split(':'))}
 
     def __set_cache_expiry(self, key, modify, expire):
         mod_str = modify.astimezone(datetime.timezone.utc).strftime(
@@ -824,15 +1092,68 @@ class RedisDatabase(database.Database):
     def __get_cache_expiry(self, key):
         return self.__connection.hgetall(key)
 
-    def __add_infos(self, worker, infos, field_spec, id_key, hash_func):
+    @contextlib.contextmanager
+    def __pipeline(self, pipeline=None, transaction=False):
+        if pipeline is not None:
+            yield pipeline
+            return
+
+        # Only writers that replace a list or set need MULTI/EXEC, so that
+        # readers never observe it deleted but not yet refilled
+        with self.__connection.pipeline(transaction=transaction) as conn:
+            yield conn
+            conn.execute()
+
+    def __get_info(self, field_spec, key):
+        cache_key = (self.__server_key, key)
+        now = time.monotonic()
+        with self.__info_cache_lock:
+            entry = self.__info_cache.get(cache_key)
+            if entry is not None:
+                expires, info = entry
+                if expires > now:
+                    self.__info_cache.move_to_end(cache_key)
+                    return dict(info)
+                del self.__info_cache[cache_key]
+
+        info = self.__cast_fields(field_spec, self.__connection.hgetall(key))
+        if info and self.__info_cache_size > 0:
+            with self.__info_cache_lock:
+                self.__info_cache[cache_key] = (
+                    now + self.__info_cache_ttl, info)
+                while len(self.__info_cache) > self.__info_cache_size:
+                    self.__info_cache.popitem(last=False)
+
+        return dict(info)
+
+    def __evict_infos(self, keys):
+        with self.__info_cache_lock:
+            for key in keys:
+                self.__info_cache.pop((self.__server_key, key), None)
+
+    def __get_infos(self, info_ids, field_spec, hash_func):
+        with self.__connection.pipeline(transaction=False) as conn:
+            for info_id in info_ids:
+                conn.hgetall(hash_func(info_id))
+            results = conn.execute()
+
+        return [self.__cast_fields(field_spec, result) for result in results]
+
+    def __add_infos(
+            self, worker, infos, field_spec, id_key, hash_func, pipeline):
         with stats.Stats.Timer() as timer:
-            with self.__connection.pipeline() as conn:
+            with self.__pipeline(pipeline) as conn:
                 for info in infos:
                     info_id = info[id_key]
                     conn.hset(
                         hash_func(info_id),
                         mapping=self.__extract_fields(field_spec, info))
-                conn.execute()
+
+        keys = [hash_func(info[id_key]) for info in infos]
+        if pipeline is None:
+            self.__evict_infos(keys)
+        else:
+            pipeline.__evict_keys.extend(keys)
 
         worker.stats().update(
             stats.Stats.UPDATE,
@@ -0,0 +1,187 @@
+#
+# Copyright 2020 Taylor Petrick
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Adaptive retry policy for ESI requests
+"""
+
+import collections
+import threading
+import time
+
+from urllib3.util import Retry
+
+class RetryGuard():
+    """
+    Tracks the failure rate of recent ESI responses, and turns retries off
+    while ESI is failing most requests so that workers do not pile retries
+    onto an outage.
+    """
+
+    # The number of recent responses used to compute the failure rate
+    __WINDOW            = 100
+
+    # The minimum number of responses before retries can be disabled
+    __MIN_RESPONSES     = 20
+
+    # The failure rate above which retries are disabled
+    __DISABLE_RATE      = 0.5
+
+    # The failure rate below which retries are enabled again
+    __ENABLE_RATE       = 0.2
+
+    def __init__(self):
+        """
+        Constructs a new guard with retries enabled
+        """
+
+        self.__enabled = True
+        self.__failures = 0
+        self.__lock = threading.Lock()
+        self.__results = collections.deque(maxlen=self.__WINDOW)
+
+    def record(self, status):
+        """
+        Records the final status code of an ESI response.
+
+        Args:
+            status: The HTTP status code of the response.
+        """
+
+        failed = status >= 500 or status == 429
+        with self.__lock:
+            if len(self.__results) == self.__WINDOW:
+                self.__failures -= self.__results[0]
+            self.__results.append(failed)
+            self.__failures += failed
+
+            if len(self.__results) < self.__MIN_RESPONSES:
+                return
+
+            rate = self.__failures / len(self.__results)
+            if self.__enabled and rate > self.__DISABLE_RATE:
+                self.__enabled = False
+            elif not self.__enabled and rate < self.__ENABLE_RATE:
+                self.__enabled = True
+
+    def should_retry(self):
+        """
+        Returns whether failed requests should currently be retried
+        """
+
+        return self.__enabled
+
+class GuardedRetry(Retry):
+    """
+    urllib3 retry policy that only retries failed responses while the
+    associated RetryGuard allows it.
+    """
+
+    def __init__(self, *args, guard=None, **kwargs):
+        """
+        Constructs a new retry policy.
+
+        Args:
+            guard: The RetryGuard that is consulted before each retry.
+        """
+
+        Retry.__init__(self, *args, **kwargs)
+        self.guard = guard
+
+    def new(self, **kwargs):
+        retry = Retry.new(self, **kwargs)
+        retry.guard = self.guard
+        return retry
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if self.guard and not self.guard.should_retry():
+            return False
+        return Retry.is_retry(self, method, status_code, has_retry_after)
+
+class GuardedTransport():
+    """
+    httpx transport wrapper that retries retryable status codes with
+    exponential backoff while the associated RetryGuard allows it, matching
+    GuardedRetry for the requests session.
+    """
+
+    def __init__(self, transport, guard, total, backoff_factor, statuses):
+        """
+        Constructs a new retrying transport.
+
+        Args:
+            transport: The httpx transport that sends each request.
+            guard: The RetryGuard that records results and gates retries.
+            total: The maximum number of retries per request.
+            backoff_factor: The base delay in seconds between retries.
+            statuses: The status codes that should be retried.
+        """
+
+        self.__backoff_factor = backoff_factor
+        self.__guard = guard
+        self.__statuses = statuses
+        self.__total = total
+        self.__transport = transport
+
+    def __enter__(self):
+        self.__transport.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        self.__transport.__exit__(*args)
+
+    def handle_request(self, request):
+        """
+        Sends the request, retrying it on a retryable status code.
+
+        Args:
+            request: The httpx.Request to send.
+
+        Returns:
+            The final httpx.Response.
+        """
+
+        attempt = 0
+        while True:
+            response = self.__transport.handle_request(request)
+            if (response.status_code not in self.__statuses
+                    or attempt >= self.__total
+                    or not self.__guard.should_retry()):
+                self.__guard.record(response.status_code)
+                return response
+
+            retry_after = response.headers.get('retry-after', '')
+            if retry_after.isdigit():
+                delay = int(retry_after)
+            else:
+                delay = self.__backoff_factor * (2 ** attempt)
+
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        """
+        Closes the wrapped transport.
+        """
+
+        self.__transport.close()
@@ -128,8 +128,7 @@ class SearchIndex():
         region_ids = database.get_regions()
 
         writer = index.writer()
-        for region_id in region_ids:
-            region_info = database.get_region_info(region_id)
+        for region_info in database.get_region_infos(region_ids):
             writer.add_document(
                 name=region_info['name'],
                 id=region_info['id'],
@@ -141,8 +140,7 @@ class SearchIndex():
         writer = index.writer()
         for region_id in region_ids:
             system_ids = database.get_systems(region_id)
-            for system_id in system_ids:
-                system_info = database.get_system_info(system_id)
+            for system_info in database.get_system_infos(system_ids):
                 writer.add_document(
                     name=system_info['name'],
                     id=system_info['id'],
@@ -158,8 +156,7 @@ class SearchIndex():
             type_ids += database.get_group_types(group_id)
 
         writer = index.writer()
-        for type_id in type_ids:
-            type_info = database.get_type_info(type_id)
+        for type_info in database.get_type_infos(type_ids):
             writer.add_document(
                 name=type_info['name'],
                 id=type_info['id'],
@@ -178,8 +178,22 @@ class UpdateGroupInfoTask():
             if 'types' in group_info:
                 worker.log().info("Fetching %d item type infos for group %d",
                     len(group_info['types']), group_id)
+                names = self.__global_api.fetch_names(
+                    worker, group_info['types'])
                 for type_id in group_info['types']:
-                    type_info = self.__global_api.fetch_type_info(worker, type_id)
+                    name_info = names.get(type_id)
+                    if name_info:
+                        type_infos.append({
+                            'name': name_info['name'],
+                            'type_id': type_id,
+                            'market_group_id': group_id
+                        })
+                        continue
+
+                    # A failed names request rejects its whole chunk, so the
+                    # missing types are fetched one at a time instead
+                    type_info = self.__global_api.fetch_type_info(
+                        worker, type_id)
                     if type_info:
                         type_infos.append(type_info)
                     else:
@@ -218,7 +232,7 @@ class UpdateOrdersTask():
     optional item type ID filter.
     """
 
-    def __init__(self, region_api, type_id=None):
+    def __init__(self, region_api, type_id=None, persist_pages=False):
         """
         Constructs a task that updates all orders in the specified region,
         with the optional type ID filter.
@@ -226,8 +240,11 @@ class UpdateOrdersTask():
         Args:
             region_api: The marketwatch.api.API instance for the region
             type_id: The optional item type ID filter.
+            persist_pages: Whether updated order page etags should be stored
+                to the database.
         """
 
+        self.__persist_pages = persist_pages
         self.__region_api = region_api
         self.__region_id = region_api.region_id()
         self.__type_id = type_id
@@ -244,12 +261,15 @@ class UpdateOrdersTask():
                 for order in order_page:
                     order['system_id'] = self.__system_id
 
-                worker.database().add_orders(
-                    worker, self.__region_id, order_page)
+            with worker.database().pipeline(worker) as pipeline:
+                if order_page:
+                    worker.database().add_orders(
+                        worker, self.__region_id, order_page, pipeline)
 
-            if order_cache:
-                worker.log().info("\tRefreshing cached orders")
-                worker.database().refresh_orders(worker, order_cache)
+                if order_cache:
+                    worker.log().info("\tRefreshing cached orders")
+                    worker.database().refresh_orders(
+                        worker, order_cache, pipeline)
 
         def __update(order_page, order_cache):
             if order_page:
@@ -280,12 +300,15 @@ class UpdateOrdersTask():
                     location_infos.append(location_info)
                     location_ids.append(location_id)
 
-                worker.database().add_orders(
-                    worker, self.__region_id, order_page)
+            with worker.database().pipeline(worker) as pipeline:
+                if order_page:
+                    worker.database().add_orders(
+                        worker, self.__region_id, order_page, pipeline)
 
-            if order_cache:
-                worker.log().info("\tRefreshing cached orders")
-                worker.database().refresh_orders(worker, order_cache)
+                if order_cache:
+                    worker.log().info("\tRefreshing cached orders")
+                    worker.database().refresh_orders(
+                        worker, order_cache, pipeline)
 
         if self.__type_id:
             worker.log().info(
@@ -319,3 +342,7 @@ class UpdateOrdersTask():
             else:
                 self.__system_id = 0
             self.__region_api.fetch_structure_orders(worker, structure_id, __update_structure)
+
+        if self.__persist_pages:
+            worker.database().set_order_pages(
+                worker, self.__region_id, self.__region_api.get_dirty_pages())
@@ -114,7 +114,7 @@ class Watcher():
         self.__worker_pool.log().info("Refreshing API access token")
 
         try:
-            data = self.__global_api.fetch_access()
+            data = self.__global_api.fetch_access(self.__worker_pool.session())
 
             access_token = data['access_token']
             refresh_token = data['refresh_token']
@@ -137,8 +137,11 @@ class Watcher():
         for region_id in self.__database.get_regions():
             self.__worker_pool.log().info(
                 "\tAdding regional API for %i", region_id)
-            self.__region_apis[region_id] = api.RegionalAPI(
-                self.__config, region_id)
+            region_api = api.RegionalAPI(self.__config, region_id)
+            if self.__config.getboolean(
+                    'database', 'page_cache', fallback=False):
+                region_api.set_pages(self.__database.get_order_pages(region_id))
+            self.__region_apis[region_id] = region_api
 
     def __update_universe(self):
         if self.__config.getboolean('job', 'regions'):
@@ -176,6 +179,9 @@ class Watcher():
             self.__refresh_access()
             self.__worker_pool.log().info("Updating orders for all regions")
             for _, region_api in self.__region_apis.items():
-                self.__worker_pool.enqueue(tasks.UpdateOrdersTask(region_api))
+                self.__worker_pool.enqueue(tasks.UpdateOrdersTask(
+                    region_api,
+                    persist_pages=self.__config.getboolean(
+                        'database', 'page_cache', fallback=False)))
         else:
             self.__worker_pool.log().info("Skipping order update")
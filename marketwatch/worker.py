@@ -25,34 +25,42 @@
 import queue
 import threading
 
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
 from . import database
 from . import logging
+from . import retry
 from . import stats
 
 class Worker():
     """
     Worker
     """
-    def __init__(self, config, name, index):
+    def __init__(self, config, name, index, session, executor):
         self.__config = config
         self.__database = database.Database.instance(config)
+        self.__executor = executor
         self.__index = index
         self.__log = logging.Logging.create(config, name, name.lower())
         self.__name = name
-        self.__session = requests.Session()
+        self.__session = session
         self.__stats = stats.Stats()
 
-        adapter = requests.adapters.HTTPAdapter(max_retries=3)
-        self.__session.mount('https://', adapter)
-
     def database(self):
         """
         Returns the database connection associated with the worker
         """
         return self.__database
 
+    def executor(self):
+        """
+        Returns the thread pool used for concurrent requests. The executor
+        is shared by all workers in the containing pool
+        """
+        return self.__executor
+
     def index(self):
         """
         Returns the worker index in the containing pool
@@ -67,7 +75,8 @@ class Worker():
 
     def session(self):
         """
-        Returns the HTTPS request session cache for the worker
+        Returns the HTTPS request session cache for the worker. The session
+        is shared by all workers in the containing pool
         """
         return self.__session
 
@@ -81,16 +90,31 @@ class WorkerPool():
     """
     Pool
     """
+
+    # The number of times a failed ESI request is retried
+    __REQUEST_RETRIES = 3
+
+    # The HTTP status codes that cause an ESI request to be retried
+    __RETRY_STATUSES = (429, 500, 502, 503, 504)
+
     def __init__(self, config, base_index=0):
         self.__log = logging.Logging.create(config, "Main", "main")
         self.__queue = queue.Queue()
+        self.__session = WorkerPool.__create_session(config)
         self.__workers = []
 
+        self.__executor = ThreadPoolExecutor(
+            max_workers=config.getint('pool', 'size') * config.getint(
+                'request', 'concurrency', fallback=4),
+            thread_name_prefix='Request')
+
         for i in range(config.getint('pool', 'size')):
             worker_index = i + base_index
             worker_name = "Worker{:02}".format(worker_index)
 
-            worker = Worker(config, worker_name, worker_index)
+            worker = Worker(
+                config, worker_name, worker_index, self.__session,
+                self.__executor)
             thread = threading.Thread(
                 target = WorkerPool.__process,
                 args = (self, worker),
@@ -112,6 +136,12 @@ class WorkerPool():
         """
         return self.__log
 
+    def session(self):
+        """
+        Returns the HTTPS request session shared by all workers in the pool
+        """
+        return self.__session
+
     def wait(self):
         """
         Waits for pending work to complete
@@ -126,6 +156,51 @@ class WorkerPool():
 
         total.dump(self.__log)
 
+    @staticmethod
+    def __create_session(config):
+        guard = retry.RetryGuard()
+
+        if config.getboolean('request', 'http2', fallback=False):
+            import httpx
+            limits = httpx.Limits(
+                max_connections=config.getint(
+                    'request', 'pool_maxsize', fallback=32),
+                max_keepalive_connections=config.getint(
+                    'request', 'pool_maxsize'))
+            transport = httpx.HTTPTransport(
+                http2=True, limits=limits, retries=WorkerPool.__REQUEST_RETRIES)
+            # requests never times out by default, so neither does httpx
+            return httpx.Client(
+                transport=retry.GuardedTransport(
+                    transport,
+                    guard,
+                    total=WorkerPool.__REQUEST_RETRIES,
+                    backoff_factor=0.5,
+                    statuses=WorkerPool.__RETRY_STATUSES),
+                timeout=None)
+
+        retry_policy = retry.GuardedRetry(
+            total=WorkerPool.__REQUEST_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=WorkerPool.__RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            allowed_methods=None,
+            guard=guard)
+
+        session = requests.Session()
+        session.hooks['response'].append(
+            lambda response, *args, **kwargs: guard.record(
+                response.status_code))
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=config.getint(
+                'request', 'pool_connections', fallback=4),
+            pool_maxsize=config.getint(
+                'request', 'pool_maxsize', fallback=32),
+            max_retries=retry_policy)
+        session.mount('https://', adapter)
+        return session
+
     @staticmethod
     def __process(pool, worker):
         while True:
@@ -21,12 +21,7 @@ def regions(response: Response):
         response.headers['Last-Modified'] = cache_expiry['modify']
         response.headers['Expires'] = cache_expiry['expire']
 
-    region_ids = conn.get_regions()
-    regions = []
-    for region_id in region_ids:
-        regions.append(conn.get_region_info(region_id))
-
-    return regions
+    return conn.get_region_infos(conn.get_regions())
 
 @app.get("/universe/systems/{region_id}")
 def systems(response: Response, region_id: int):
@@ -37,31 +32,18 @@ def systems(response: Response, region_id: int):
         response.headers['Last-Modified'] = cache_expiry['modify']
         response.headers['Expires'] = cache_expiry['expire']
 
-    system_ids = conn.get_systems(region_id)
-    systems = []
-    for system_id in system_ids:
-        systems.append(conn.get_system_info(system_id))
-
-    return systems
+    return conn.get_system_infos(conn.get_systems(region_id))
 
 @app.get("/universe/locations/{region_id}")
 def locations(region_id: int):
     conn = database.Database.instance(config)
-    location_ids = conn.get_locations(region_id)
-    locations = []
-    for location_id in location_ids:
-        locations.append(conn.get_location_info(location_id))
-    return locations
+    return conn.get_location_infos(conn.get_locations(region_id))
 
 @app.post("/universe/locations")
 def locations(location_ids: List[int]):
     conn = database.Database.instance(config)
-    locations = []
-    for location_id in location_ids:
-        location_info = conn.get_location_info(location_id)
-        if location_info:
-            locations.append(location_info)
-    return locations
+    locations = conn.get_location_infos(location_ids)
+    return [location_info for location_info in locations if location_info]
 
 @app.get("/universe/location/{location_id}")
 def location(location_id: int):
@@ -99,12 +81,7 @@ def groups(response: Response):
         response.headers['Last-Modified'] = cache_expiry['modify']
         response.headers['Expires'] = cache_expiry['expire']
 
-    group_ids = conn.get_groups()
-    groups = []
-    for group_id in group_ids:
-        groups.append(conn.get_group_info(group_id))
-
-    return groups
+    return conn.get_group_infos(conn.get_groups())
 
 @app.get("/market/group/{group_id}")
 def group_types(response: Response, group_id: int):
@@ -115,12 +92,7 @@ def group_types(response: Response, group_id: int):
         response.headers['Last-Modified'] = cache_expiry['modify']
         response.headers['Expires'] = cache_expiry['expire']
 
-    type_ids = conn.get_group_types(group_id)
-    types = []
-    for type_id in type_ids:
-        types.append(conn.get_type_info(type_id))
-
-    return types
+    return conn.get_type_infos(conn.get_group_types(group_id))
 
 @app.get("/search/{search_type}")
 def search_types(search_type: int, query: Optional[str]="", pid: Optional[int]=0):